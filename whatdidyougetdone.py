@@ -4,7 +4,9 @@
 # dependencies = [
 #   "PyGithub>=2.1.1",
 #   "click>=8.1.7",
+#   "orjson>=3.9.10",
 #   "platformdirs>=4.1.0",
+#   "requests>=2.31.0",
 # ]
 # [tool.uv]
 # exclude-newer = "2024-01-01T00:00:00Z"
@@ -16,12 +18,24 @@
 #   ./whatdidyougetdone.py team <username1> <username2> ...
 
 import click
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-import json
+import orjson
 import os
 from pathlib import Path
-from typing import Optional
-from github import Github
+import re
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterable, Iterator, Optional
+from github import Github, GithubException
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester, RequestsResponse
 from platformdirs import user_config_dir
 
 # Define app name and author for config directory
@@ -78,8 +92,6 @@ def get_github_token() -> str:
 
     # Try GitHub CLI
     try:
-        import subprocess
-
         result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True)
         if result.returncode == 0:
             return result.stdout.strip()
@@ -101,82 +113,384 @@ def preview_in_browser(filename: Path):
             webbrowser.open(f"file://{os.path.abspath(filename)}")
 
 
+# Max concurrent requests to the GitHub API
+MAX_WORKERS = 8
+
+# Items per page for paginated REST calls, the maximum GitHub allows
+PER_PAGE = 100
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Commits per GraphQL query, keeps each query well within GitHub's node limits
+GRAPHQL_BATCH_SIZE = 100
+
+# How long cached API responses are kept around for revalidation
+CACHE_TTL = timedelta(days=1)
+
+# Wait for the rate limit reset once fewer requests than this remain
+RATE_LIMIT_THRESHOLD = 10
+
+# Retries for requests rejected by GitHub's rate limits
+RATE_LIMIT_RETRIES = 3
+
+# Retries for dropped connections and 5xx responses, like PyGithub's default retry.
+# 403/429 are left to RateLimitAdapter, and the last 5xx is returned rather than raised.
+SERVER_ERROR_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=range(500, 600),
+    allowed_methods=None,
+    raise_on_status=False,
+)
+
+
+class RateLimitAdapter(HTTPAdapter):
+    """
+    Transport adapter that tracks GitHub's rate limit headers, waiting for the
+    reset before the limit runs out and retrying rate-limited requests with
+    exponential backoff.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.limits_lock = threading.Lock()
+        # (remaining, reset timestamp) per rate limit resource, e.g. core or graphql
+        self.limits: dict[str, tuple[int, float]] = {}
+
+    def send(self, request, **kwargs):
+        resource = "graphql" if request.path_url == "/graphql" else "core"
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            with self.limits_lock:
+                remaining, reset = self.limits.get(resource, (RATE_LIMIT_THRESHOLD, 0.0))
+            if remaining < RATE_LIMIT_THRESHOLD:
+                self.wait(reset - time.time())
+
+            response = super().send(request, **kwargs)
+            headers = response.headers
+            if "X-RateLimit-Remaining" in headers and "X-RateLimit-Reset" in headers:
+                with self.limits_lock:
+                    self.limits[headers.get("X-RateLimit-Resource", resource)] = (
+                        int(headers["X-RateLimit-Remaining"]),
+                        float(headers["X-RateLimit-Reset"]),
+                    )
+
+            # 429s and 403s with an exhausted limit or Retry-After are rate limits,
+            # other 403s are permission errors
+            rate_limited = response.status_code == 429 or (
+                response.status_code == 403
+                and (headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in headers)
+            )
+            if not rate_limited or attempt == RATE_LIMIT_RETRIES:
+                return response
+
+            if "Retry-After" in headers:
+                delay = float(headers["Retry-After"])
+            elif headers.get("X-RateLimit-Remaining") == "0":
+                delay = float(headers["X-RateLimit-Reset"]) - time.time()
+            else:
+                delay = 2 ** attempt
+            response.close()
+            self.wait(delay)
+
+    def wait(self, seconds: float):
+        """Sleep for the given number of seconds, if any."""
+        if seconds > 0:
+            print(f"GitHub rate limit reached, waiting {seconds:.0f}s", file=sys.stderr)
+            time.sleep(seconds)
+
+
+class ETagCacheAdapter(RateLimitAdapter):
+    """
+    Transport adapter that caches GET responses on disk and revalidates them
+    with If-None-Match, so unchanged resources cost a 304 instead of a full
+    response (304s don't count against the rate limit).
+    """
+
+    def __init__(self, cache_file: Path, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(cache_file, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(url TEXT PRIMARY KEY, etag TEXT, headers TEXT, body BLOB, fetched_at REAL)"
+            )
+            # Drop entries that haven't been used within the TTL
+            expired = (datetime.now(timezone.utc) - CACHE_TTL).timestamp()
+            self.db.execute("DELETE FROM responses WHERE fetched_at < ?", (expired,))
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        with self.lock:
+            cached = self.db.execute(
+                "SELECT etag, headers, body FROM responses WHERE url = ?", (request.url,)
+            ).fetchone()
+        if cached and "If-None-Match" not in request.headers:
+            request.headers["If-None-Match"] = cached[0]
+
+        response = super().send(request, **kwargs)
+        now = datetime.now(timezone.utc).timestamp()
+
+        if response.status_code == 304 and cached:
+            # Serve the cached body, with fresh headers (rate limits etc.) on top
+            etag, headers, body = cached
+            fresh_headers = dict(response.headers)
+            response.headers.clear()
+            response.headers.update(orjson.loads(headers))
+            response.headers.update(fresh_headers)
+            response.status_code = 200
+            response._content = body
+            with self.lock, self.db:
+                self.db.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (now, request.url))
+        elif response.status_code == 200 and "ETag" in response.headers:
+            # Body is stored decoded, so drop headers describing the wire encoding
+            headers = {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+            }
+            with self.lock, self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (request.url, response.headers["ETag"], orjson.dumps(headers), response.content, now),
+                )
+        return response
+
+    def close(self):
+        super().close()
+        self.db.close()
+
+
+class SessionConnection(HTTPSRequestsConnectionClass):
+    """PyGithub connection that sends all requests through the shared session."""
+
+    def __init__(self, host: str, port: Optional[int] = None, timeout: Optional[int] = None, **kwargs):
+        self.host = host
+        self.port = port if port else 443
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.session = session
+
+    def getresponse(self) -> RequestsResponse:
+        # Leave out the default port so URLs match the session's mounts and cache keys
+        netloc = self.host if self.port == 443 else f"{self.host}:{self.port}"
+        verb = getattr(self.session, self.verb.lower())
+        response = verb(
+            f"{self.protocol}://{netloc}{self.url}",
+            headers=self.headers,
+            data=self.input,
+            timeout=self.timeout,
+            verify=self.verify,
+            allow_redirects=False,
+        )
+        return RequestsResponse(response)
+
+    def close(self):
+        # The shared session outlives individual connections
+        pass
+
+
+# Shared HTTP session for GraphQL requests and PyGithub
+session = requests.Session()
+# Keep requests from replacing our Authorization header with .netrc credentials
+session.auth = Requester.noopAuth
+
 def setup_github():
-    """Ensure GitHub token is available."""
+    """Ensure GitHub token is available and route API calls through the cache and rate limiter."""
     token = get_github_token()
     os.environ["GITHUB_TOKEN"] = token  # Set for Github instance
 
-def get_user_activity(username: str, days: int = 7):
-    """Get GitHub activity for a user over the last N days."""
-    g = Github(os.getenv("GITHUB_TOKEN"))
-    user = g.get_user(username)
+    # Pooled connections for the team command's user threads plus the GraphQL batch threads
+    adapter = ETagCacheAdapter(
+        get_config_dir() / "cache.sqlite",
+        pool_maxsize=2 * MAX_WORKERS,
+        max_retries=SERVER_ERROR_RETRY,
+    )
+    # Mount for both spellings of the host so no API request can bypass the rate limiter
+    for prefix in ("https://api.github.com/", "https://api.github.com:443/"):
+        session.mount(prefix, adapter)
+    Requester.injectConnectionClasses(HTTPRequestsConnectionClass, SessionConnection)
+
+# Merge commits and commits that are part of PRs are left out of reports
+SKIP_COMMIT_RE = re.compile(r"\AMerge|Co-authored-by")
+
+# Per-thread Github clients, created on first use
+thread_local = threading.local()
+
+def get_github() -> Github:
+    """
+    Get the Github client for the current thread, PyGithub clients aren't thread-safe.
+    All clients send requests through the shared session, so connections are still reused.
+    """
+    if not hasattr(thread_local, "github"):
+        thread_local.github = Github(os.getenv("GITHUB_TOKEN"), per_page=PER_PAGE)
+    return thread_local.github
+
+# Runs GraphQL batches for all users, so concurrent users share MAX_WORKERS slots
+query_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+
+# Fork/parent info per repo, shared by all lookups in this run
+repo_info_cache: dict[str, dict] = {}
+
+def get_repo_info(name: str) -> dict:
+    """
+    Get fork status and parent of a repo, cached by full name.
+    Repos that are gone or inaccessible are cached as non-forks, so they're only looked up once.
+    """
+    if name not in repo_info_cache:
+        try:
+            repo = get_github().get_repo(name)
+            repo_info_cache[name] = {
+                "is_fork": repo.fork,
+                "parent": repo.parent.full_name if repo.fork else None,
+            }
+        except GithubException:
+            repo_info_cache[name] = {"is_fork": False, "parent": None}
+    return repo_info_cache[name]
+
+def build_repo_query(batch: dict[str, list[str]]) -> tuple[str, dict]:
+    """Build a GraphQL query for fork info and commit stats of several repos."""
+    params = []
+    variables = {}
+    fields = []
+    for i, (repo, shas) in enumerate(batch.items()):
+        owner, name = repo.split("/", 1)
+        params += [f"$owner{i}: String!", f"$name{i}: String!"]
+        variables[f"owner{i}"] = owner
+        variables[f"name{i}"] = name
+
+        # One aliased object lookup per commit
+        commits = []
+        for j, sha in enumerate(shas):
+            params.append(f"$sha{i}_{j}: GitObjectID!")
+            variables[f"sha{i}_{j}"] = sha
+            commits.append(f"c{j}: object(oid: $sha{i}_{j}) {{ ... on Commit {{ additions deletions }} }}")
+
+        # Fork info is only needed for repos we haven't looked up yet
+        if not shas or repo not in repo_info_cache:
+            commits.insert(0, "isFork parent { nameWithOwner }")
+
+        fields.append(
+            f"r{i}: repository(owner: $owner{i}, name: $name{i}) "
+            f"{{ {' '.join(commits)} }}"
+        )
+
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+    return query, variables
+
+def run_repo_query(batch: dict[str, list[str]]) -> dict[tuple[str, str], dict]:
+    """
+    Run a GraphQL query for a batch of repos.
+    Caches fork info and returns commit stats keyed by (repo, sha).
+    """
+    query, variables = build_repo_query(batch)
+    try:
+        response = session.post(
+            GRAPHQL_URL,
+            data=orjson.dumps({"query": query, "variables": variables}),
+            headers={
+                "Authorization": f"bearer {os.getenv('GITHUB_TOKEN')}",
+                "Content-Type": "application/json",
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        # A failed batch only costs its commit stats, fork info falls back to get_repo_info
+        print(f"Could not get repo details from GitHub: {e}", file=sys.stderr)
+        return {}
+
+    data = result.get("data")
+    if data is None:
+        print(f"Could not get repo details from GitHub: {result.get('errors')}", file=sys.stderr)
+        return {}
+
+    stats = {}
+    for i, (repo, shas) in enumerate(batch.items()):
+        # Missing or inaccessible repos come back as null
+        repo_data = data.get(f"r{i}")
+        if repo_data is None:
+            continue
+
+        if "isFork" in repo_data:
+            parent = repo_data["parent"]
+            repo_info_cache[repo] = {
+                "is_fork": repo_data["isFork"],
+                "parent": parent["nameWithOwner"] if parent else None,
+            }
+        for j, sha in enumerate(shas):
+            commit = repo_data.get(f"c{j}")
+            if commit:
+                stats[(repo, sha)] = {"additions": commit["additions"], "deletions": commit["deletions"]}
+    return stats
+
+def get_repo_details(repo_shas: dict[str, list[str]]) -> dict[tuple[str, str], dict]:
+    """
+    Get fork info and commit stats for many repos using batched GraphQL queries.
+    Fork info goes into repo_info_cache, commit stats are returned keyed by (repo, sha).
+    """
+    # Repos without commits are only looked up for fork info
+    repo_shas = {repo: shas for repo, shas in repo_shas.items() if shas or repo not in repo_info_cache}
+    if not repo_shas:
+        return {}
+
+    # Split into batches of roughly GRAPHQL_BATCH_SIZE lookups (repos + commits)
+    batches: list[dict[str, list[str]]] = [{}]
+    size = 0
+    for repo, shas in repo_shas.items():
+        for start in range(0, max(len(shas), 1), GRAPHQL_BATCH_SIZE):
+            chunk = shas[start:start + GRAPHQL_BATCH_SIZE]
+            if batches[-1] and size + len(chunk) + 1 > GRAPHQL_BATCH_SIZE:
+                batches.append({})
+                size = 0
+            batches[-1][repo] = chunk
+            size += len(chunk) + 1
+
+    stats: dict[tuple[str, str], dict] = {}
+    for batch_stats in query_executor.map(run_repo_query, batches):
+        stats.update(batch_stats)
+    return stats
+
+def get_user_activity(
+    username: str,
+    days: int = 7,
+    end_date: Optional[datetime] = None,
+    skip_fork_check: bool = False,
+):
+    """
+    Get GitHub activity for a user over the N days up to end_date (default: now).
+    With skip_fork_check, repos owned by the user are assumed not to be forks.
+    """
+    user = get_github().get_user(username)
 
     # Calculate date range (in UTC)
-    end_date = datetime.now(timezone.utc)
+    end_date = end_date or datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
 
     # Get all events
     activities = []
+    pushed_commits: list[dict] = []
     for event in user.get_events():
         if event.created_at < start_date:
             break
 
         # Format based on event type
         if event.type == "PushEvent":
-            # Only process commits if:
-            # 1. The push was by the user we're interested in
-            # 2. If it's a fork, only include commits not from parent repo
+            # Only process commits if the push was by the user we're interested in,
+            # fork checks and stats are resolved once all events are collected
             if event.actor.login == username:
-                # Get repo info to check if it's a fork
-                repo_info = json.loads(os.popen(f'gh repo view {event.repo.name} --json isFork,parent').read())
-                
-                # For forks, skip showing commits if they're in the parent
-                if repo_info.get('isFork', False):
-                    parent_repo = repo_info['parent']
-                    parent_name = f"{parent_repo['owner']['login']}/{parent_repo['name']}"
-                    
-                    # If user has access to parent repo, show commits there instead
-                    try:
-                        os.popen(f'gh repo view {parent_name}').read()
-                        # User has access, skip showing in fork
-                        continue
-                    except:
-                        # User doesn't have access to parent, show in fork
-                        for commit in event.payload["commits"]:
-                            activities.append({
-                                "type": "commit",
-                                "repo": event.repo.name,
-                                "message": commit["message"],
-                                "date": event.created_at,
-                                "author": commit["author"],
-                                "sha": commit["sha"]
-                            })
-                else:
-                    # For non-forks, include all commits
-                    for commit in event.payload["commits"]:
-                        # Get commit stats from GitHub API
-                        try:
-                            stats_output = os.popen(f'gh api repos/{event.repo.name}/commits/{commit["sha"]}').read()
-                            commit_data = json.loads(stats_output)
-                            activities.append({
-                                "type": "commit",
-                                "repo": event.repo.name,
-                                "message": commit["message"],
-                                "date": event.created_at,
-                                "author": commit["author"],
-                                "sha": commit["sha"],
-                                "stats": commit_data.get("stats", {})
-                            })
-                        except:
-                            # If we can't get stats, add commit without them
-                            activities.append({
-                                "type": "commit",
-                                "repo": event.repo.name,
-                                "message": commit["message"],
-                                "date": event.created_at,
-                                "author": commit["author"],
-                                "sha": commit["sha"]
-                            })
+                for commit in event.payload["commits"]:
+                    pushed_commits.append({
+                        "type": "commit",
+                        "repo": event.repo.name,
+                        "message": commit["message"],
+                        "date": event.created_at,
+                        "author": commit["author"],
+                        "sha": commit["sha"]
+                    })
         elif event.type == "PullRequestEvent":
             pr = event.payload["pull_request"]
             base_repo = pr["base"]["repo"]["full_name"]
@@ -200,86 +514,102 @@ def get_user_activity(username: str, days: int = 7):
                 })
         # Add more event types as needed
 
-    return activities
-
-
-def generate_report(username: str, days: int = 7, include_timeline: bool = False):
-    """Generate a markdown report of user activity."""
-    activities = get_user_activity(username, days)
+    # Get repo info and commit stats for every repo we've seen in one go,
+    # asking for each commit once even if it shows up in several pushes
+    repo_shas: dict[str, list[str]] = {activity["repo"]: [] for activity in activities}
+    wanted: set[tuple[str, str]] = set()
+    for commit in pushed_commits:
+        key = (commit["repo"], commit["sha"])
+        if key not in wanted:
+            wanted.add(key)
+            repo_shas.setdefault(commit["repo"], []).append(commit["sha"])
+
+    if skip_fork_check:
+        # Most pushes go to the user's own non-fork repos, so skip looking those up
+        for repo in repo_shas:
+            if repo.split("/")[0].lower() == username.lower():
+                repo_info_cache.setdefault(repo, {"is_fork": False, "parent": None})
+
+    commit_stats = get_repo_details(repo_shas)
+
+    for commit in pushed_commits:
+        # For forks, skip showing commits if the user has access to the parent repo,
+        # they show up there instead
+        repo_info = get_repo_info(commit["repo"])
+        if repo_info["is_fork"] and repo_info["parent"]:
+            continue
+
+        # If we can't get stats, keep the commit without them
+        if (commit["repo"], commit["sha"]) in commit_stats:
+            commit["stats"] = commit_stats[(commit["repo"], commit["sha"])]
+        activities.append(commit)
 
-    # Calculate summary stats
-    total_commits = sum(1 for a in activities if a["type"] == "commit")
-    total_prs = sum(1 for a in activities if a["type"] == "pr")
-    active_repos = len({a["repo"] for a in activities})
-
-    # Generate markdown
-    report = f"# What did {username} get done?\n\n"
-    report += f"Activity report for the last {days} days:\n\n"
+    return activities
 
-    # Summary stats
-    report += "## Summary\n\n"
-    report += f"- 💻 {total_commits} commits\n"
-    report += f"- 🔀 {total_prs} pull requests\n"
-    report += f"- 📦 {active_repos} active repositories\n\n"
 
+def generate_report(
+    username: str,
+    activities: list[dict],
+    days: int = 7,
+    include_timeline: bool = False,
+    end_date: Optional[datetime] = None,
+) -> Iterator[str]:
+    """Generate a markdown report from already fetched user activity, yielded in chunks."""
     # Group by repo
-    repos: dict[str, list[dict]] = {}
+    repos: dict[str, list[dict]] = defaultdict(list)
     for activity in activities:
-        repo = activity["repo"]
-        if repo not in repos:
-            repos[repo] = []
-        repos[repo].append(activity)
+        repos[activity["repo"]].append(activity)
     
     # Calculate date range
-    end_date = datetime.now(timezone.utc)
+    end_date = end_date or datetime.now(timezone.utc)
     start_date = end_date - timedelta(days=days)
     
     # Generate markdown
-    report = f"# What did {username} get done?\n\n"
-    report += f"Activity from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}:\n\n"
+    yield f"# What did {username} get done?\n\n"
+    yield f"Activity from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}:\n\n"
     
     # Add summary if there's activity
     if activities:
         total_commits = len({a["sha"] for a in activities if a["type"] == "commit"})
         total_prs = len({(a["repo"], a["title"]) for a in activities if a["type"] == "pr"})
-        report += f"Summary:\n"
-        report += f"- 💻 {total_commits} unique commits\n"
-        report += f"- 🔀 {total_prs} pull requests\n\n"
+        yield f"Summary:\n"
+        yield f"- 💻 {total_commits} unique commits\n"
+        yield f"- 🔀 {total_prs} pull requests\n\n"
     else:
-        report += "No activity found in this time period.\n\n"
+        yield "No activity found in this time period.\n\n"
     
-    # Sort repos by activity date
+    # Sort repos by most recent activity date, computed once per repo
+    repo_max_date = {repo: max(act["date"] for act in acts) for repo, acts in repos.items()}
     sorted_repos = sorted(
         repos.items(),
-        key=lambda x: max((act["date"] for act in x[1])),
+        key=lambda x: repo_max_date[x[0]],
         reverse=True
     )
     
     for repo, acts in sorted_repos:
         # Get repo info
-        repo_info = json.loads(os.popen(f'gh repo view {repo} --json isFork,parent').read())
+        repo_info = get_repo_info(repo)
         
         # Format repo header
-        if repo_info.get('isFork', False):
-            parent = repo_info['parent']
-            report += f"## {repo} (fork of {parent['owner']['login']}/{parent['name']})\n\n"
+        if repo_info["parent"]:
+            yield f"## {repo} (fork of {repo_info['parent']})\n\n"
         else:
-            report += f"## {repo}\n\n"
+            yield f"## {repo}\n\n"
         
         # Group by type
         commits = [act for act in acts if act["type"] == "commit"]
         prs = [act for act in acts if act["type"] == "pr"]
         
         # Skip PRs in fork if they target parent
-        if repo_info.get('isFork', False):
+        if repo_info["is_fork"]:
             prs = [pr for pr in prs if pr["head_repo"] == repo]
         
         # Group PRs by title
-        pr_groups = {}
+        pr_groups: dict[str, dict] = defaultdict(
+            lambda: {'date': datetime.min.replace(tzinfo=timezone.utc), 'states': set()}
+        )
         for pr in prs:
             title = pr['title']
-            if title not in pr_groups:
-                pr_groups[title] = {'date': pr['date'], 'states': set()}
             pr_groups[title]['states'].add(pr['state'])
             # Keep the most recent date
             if pr['date'] > pr_groups[title]['date']:
@@ -289,19 +619,19 @@ def generate_report(username: str, days: int = 7, include_timeline: bool = False
         for title, info in sorted(pr_groups.items(), key=lambda x: x[1]['date'], reverse=True):
             states = info['states']
             status = "✅" if "closed" in states else "🔄"
-            report += f"- {status} {title}\n"
+            yield f"- {status} {title}\n"
         
         # Then show commits (deduplicated by SHA)
         seen_shas = set()
         for act in sorted(commits, key=lambda x: x["date"], reverse=True):
             # Skip merge commits and commits that are part of PRs
-            if act["message"].startswith("Merge") or "Co-authored-by" in act["message"]:
+            if SKIP_COMMIT_RE.search(act["message"]):
                 continue
             
             if act["sha"] not in seen_shas:
                 seen_shas.add(act["sha"])
                 # Get first line of commit message for display
-                message = act["message"].split('\n')[0].strip()
+                message = act["message"].partition('\n')[0].strip()
                 short_sha = act["sha"][:7]  # First 7 chars of SHA
                 
                 # Format additions/deletions stats
@@ -312,147 +642,181 @@ def generate_report(username: str, days: int = 7, include_timeline: bool = False
                     if adds or dels:
                         stats = f"<span style=\"color: #28a745\">+{adds}</span><span style=\"color: #dc3545\">-{dels}</span>"
                 
-                report += f"- 💻 {message} ({short_sha}){stats}\n"
-    
-    return report
-
-def save_report(username: str, report: str) -> Path:
-    """Save report to file."""
-    reports_dir = SCRIPT_DIR / "reports"
-    reports_dir.mkdir(exist_ok=True)
-
-    filename = reports_dir / f"{username}-{datetime.now().strftime('%Y-%m-%d')}.md"
-    filename.write_text(report)
-    return Path(filename)
-
-@click.group()
-def cli():
-    """What did you get done? - Activity report generator"""
-    pass
-
-
-@cli.command()
-@click.argument("username")
-@click.option("--days", default=7, help="Number of days to look back")
-@click.option("--file", help="Save output to file instead of stdout")
-@click.option("--timeline", is_flag=True, help="Include detailed timeline")
-def report(username: str, days: int, file: Optional[str], timeline: bool):
-    """Generate activity report for a GitHub user"""
-    setup_github()
-
-    # Generate report
-    report_text = generate_report(username, days, include_timeline=timeline)
-
-    # Output report
-    if file:
-        Path(file).write_text(report_text)
-        print(f"Report saved to: {file}")
-
-
-@cli.command()
-@click.argument("usernames", nargs=-1)
-@click.option("--days", default=7, help="Number of days to look back")
-@click.option("--file", help="Save output to file instead of stdout")
-@click.option("--timeline", is_flag=True, help="Include detailed timeline")
-def team(usernames: tuple[str], days: int, file: Optional[str], timeline: bool):
-    """Generate team activity report"""
-    setup_github()
+                yield f"- 💻 {message} ({short_sha}){stats}\n"
 
+def generate_team_report(results: list[tuple[str, list[dict]]], days: int = 7, include_timeline: bool = False) -> Iterator[str]:
+    """Generate a markdown team report from each member's activity, yielded in chunks."""
     # Generate combined report
-    report = "# Team Activity Report\n\n"
-    report += f"Activity for the last {days} days\n\n"
+    yield "# Team Activity Report\n\n"
+    yield f"Activity for the last {days} days\n\n"
 
     # Team summary
     total_team_commits = 0
     total_team_prs = 0
     active_repos: set[str] = set()
 
-    # Collect all activities first
     all_activities: list[tuple[str, dict]] = []
-    for username in usernames:
-        activities = get_user_activity(username, days)
+    for username, activities in results:
         all_activities.extend((username, a) for a in activities)
 
         # Update team stats
-        commit_count = sum(1 for a in activities if a["type"] == "commit")
-        pr_count = sum(1 for a in activities if a["type"] == "pr")
+        counts = Counter(a["type"] for a in activities)
         active_repos.update(a["repo"] for a in activities)
 
-        total_team_commits += commit_count
-        total_team_prs += pr_count
+        total_team_commits += counts["commit"]
+        total_team_prs += counts["pr"]
 
     # Team summary
-    report += "## Team Summary\n\n"
-    report += f"- 👥 {len(usernames)} team members\n"
-    report += f"- 💻 {total_team_commits} commits\n"
-    report += f"- 🔀 {total_team_prs} pull requests\n"
-    report += f"- 📦 {len(active_repos)} active repositories\n\n"
+    yield "## Team Summary\n\n"
+    yield f"- 👥 {len(results)} team members\n"
+    yield f"- 💻 {total_team_commits} commits\n"
+    yield f"- 🔀 {total_team_prs} pull requests\n"
+    yield f"- 📦 {len(active_repos)} active repositories\n\n"
 
     # Per-user summary
-    for username in usernames:
-        user_activities = [a for u, a in all_activities if u == username]
-        report += f"## {username}\n\n"
+    for username, user_activities in results:
+        yield f"## {username}\n\n"
 
         # User stats
-        commit_count = sum(1 for a in user_activities if a["type"] == "commit")
-        pr_count = sum(1 for a in user_activities if a["type"] == "pr")
+        counts = Counter(a["type"] for a in user_activities)
         user_repos = len({a["repo"] for a in user_activities})
 
-        report += f"- 💻 {commit_count} commits\n"
-        report += f"- 🔀 {pr_count} pull requests\n"
-        report += f"- 📦 {user_repos} active repositories\n\n"
+        yield f"- 💻 {counts['commit']} commits\n"
+        yield f"- 🔀 {counts['pr']} pull requests\n"
+        yield f"- 📦 {user_repos} active repositories\n\n"
 
 
         # Add details
-        for activity in sorted(activities, key=lambda x: x["date"], reverse=True):
+        for activity in sorted(user_activities, key=lambda x: x["date"], reverse=True):
             if activity["type"] == "commit":
-                report += f"- [{activity['repo']}] {activity['message']}\n"
+                yield f"- [{activity['repo']}] {activity['message']}\n"
             elif activity["type"] == "pr":
                 status = "✅" if activity["state"] == "closed" else "🔄"
-                report += f"- [{activity['repo']}] {status} {activity['title']}\n"
-        report += "\n"
+                yield f"- [{activity['repo']}] {status} {activity['title']}\n"
+        yield "\n"
+
+        # Group by repo
+        repos: dict[str, list[dict]] = defaultdict(list)
+        for activity in user_activities:
+            repos[activity["repo"]].append(activity)
 
         for repo, acts in repos.items():
-            report += f"### {repo}\n\n"
+            yield f"### {repo}\n\n"
             # Group by type
             commits = [act for act in acts if act["type"] == "commit"]
             prs = [act for act in acts if act["type"] == "pr"]
 
             # Show PRs first
             for act in sorted(prs, key=lambda x: x["date"], reverse=True):
-                report += f"- 🔀 {act['title']} ({act['state']})\n"
+                yield f"- 🔀 {act['title']} ({act['state']})\n"
 
             # Then commits
             for act in sorted(commits, key=lambda x: x["date"], reverse=True):
-                if (
-                    act["message"].startswith("Merge")
-                    or "Co-authored-by" in act["message"]
-                ):
+                if SKIP_COMMIT_RE.search(act["message"]):
                     continue
-                message = act["message"].split("\n")[0]
-                report += f"- 💻 {message}\n"
-            report += "\n"
+                message = act["message"].partition("\n")[0]
+                yield f"- 💻 {message}\n"
+            yield "\n"
 
     # Optional timeline
-    if timeline:
-        report += "\n<details><summary>Team Timeline</summary>\n\n"
+    if include_timeline:
+        yield "\n<details><summary>Team Timeline</summary>\n\n"
         for username, act in sorted(
             all_activities, key=lambda x: x[1]["date"], reverse=True
         ):
             date_str = act["date"].strftime("%Y-%m-%d %H:%M")
             if act["type"] == "commit":
-                message = act["message"].split("\n")[0]
-                report += f"- {date_str} 💻 {username} [{act['repo']}] {message}\n"
+                message = act["message"].partition("\n")[0]
+                yield f"- {date_str} 💻 {username} [{act['repo']}] {message}\n"
             elif act["type"] == "pr":
-                report += f"- {date_str} 🔀 {username} [{act['repo']}] {act['title']} ({act['state']})\n"
-        report += "\n</details>\n"
+                yield f"- {date_str} 🔀 {username} [{act['repo']}] {act['title']} ({act['state']})\n"
+        yield "\n</details>\n"
+
+def write_report(filename: Path, chunks: Iterable[str]):
+    """
+    Write report chunks to a file as they are generated.
+    Chunks go to a temp file next to it first, so a failure midway leaves any previous report intact.
+    """
+    tmp_file = filename.with_name(f".{filename.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "w", buffering=1 << 16) as f:
+            f.writelines(chunks)
+        os.replace(tmp_file, filename)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
+def save_report(username: str, chunks: Iterable[str], ts: Optional[datetime] = None) -> Path:
+    """Save report to file, named by the date of ts (default: now)."""
+    reports_dir = SCRIPT_DIR / "reports"
+    reports_dir.mkdir(exist_ok=True)
+
+    ts = ts or datetime.now(timezone.utc)
+    filename = reports_dir / f"{username}-{ts.strftime('%Y-%m-%d')}.md"
+    write_report(filename, chunks)
+    return Path(filename)
+
+@click.group()
+def cli():
+    """What did you get done? - Activity report generator"""
+    pass
+
+
+@cli.command()
+@click.argument("username")
+@click.option("--days", default=7, help="Number of days to look back")
+@click.option("--file", help="Save output to file instead of stdout")
+@click.option("--timeline", is_flag=True, help="Include detailed timeline")
+@click.option("--skip-fork-check", is_flag=True, help="Assume the user's own repos aren't forks")
+def report(username: str, days: int, file: Optional[str], timeline: bool, skip_fork_check: bool):
+    """Generate activity report for a GitHub user"""
+    setup_github()
+    # Use the same "now" for fetching and reporting
+    run_ts = datetime.now(timezone.utc)
+
+    # Generate report
+    activities = get_user_activity(username, days, end_date=run_ts, skip_fork_check=skip_fork_check)
+    chunks = generate_report(username, activities, days, include_timeline=timeline, end_date=run_ts)
+
+    # Output report
+    if file:
+        write_report(Path(file), chunks)
+        print(f"Report saved to: {file}")
+    else:
+        sys.stdout.writelines(chunks)
+        print()
+
+
+@cli.command()
+@click.argument("usernames", nargs=-1)
+@click.option("--days", default=7, help="Number of days to look back")
+@click.option("--file", help="Save output to file instead of stdout")
+@click.option("--timeline", is_flag=True, help="Include detailed timeline")
+@click.option("--skip-fork-check", is_flag=True, help="Assume each member's own repos aren't forks")
+def team(usernames: tuple[str], days: int, file: Optional[str], timeline: bool, skip_fork_check: bool):
+    """Generate team activity report"""
+    setup_github()
+    # Use the same "now" for every team member
+    run_ts = datetime.now(timezone.utc)
+
+    # Collect all activities first, fetching each distinct user once and concurrently
+    unique_usernames = list(dict.fromkeys(usernames))
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(unique_usernames)))) as ex:
+        fetched = dict(zip(unique_usernames, ex.map(
+            lambda u: get_user_activity(u, days, end_date=run_ts, skip_fork_check=skip_fork_check),
+            unique_usernames,
+        )))
+    # Repeated usernames still count as separate members, like the arguments given
+    results = [(username, fetched[username]) for username in usernames]
 
     # Output report
+    chunks = generate_team_report(results, days, include_timeline=timeline)
     if file:
-        Path(file).write_text(report)
+        write_report(Path(file), chunks)
         print(f"Report saved to: {file}")
     else:
-        print(report)
+        sys.stdout.writelines(chunks)
+        print()
 
 
 if __name__ == "__main__":